@@ -6,9 +6,22 @@ from unidecode import (
     unidecode,
 )  # Biblioteca necessária para converter corretamente de UTF-8 para ASCII
 import locale
-import tempfile
+import multiprocessing
 import heapq
-from typing import Dict, Optional, TextIO, Iterable, List, Tuple
+import itertools
+import json
+import bisect
+import contextlib
+import glob
+import shutil
+import urllib.parse
+import functools
+import random
+import struct
+import time
+import concurrent.futures
+import traceback
+from typing import Callable, Dict, Optional, TextIO, Iterable, List, Tuple
 
 
 # Mudo o locale pra inglês pra ele poder ler as datas de lançamento do dataset.
@@ -19,7 +32,6 @@ locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
 csv_original: str = "Google-Playstore.csv"  # Dataset original sem alterações.
 csv_small: str = "playstore_small.csv"  # Dataset reduzido, transformado em ascii, e com tamanhos fixos para cada entrada.
 csv_ordered: str = "playstore_ordered.csv"  # Dataset reduzido ordenado pela chave primária (app_id) em ordem alfabética.
-csv_ordered_time: str = "playstore_ordered_time.csv"  # Dataset reduzido ordenado pela data de lançamento em ordem crescente.
 
 
 bin_data: str = "playstore_binary.dat"  # Arquivo binário com todos os dados.
@@ -29,12 +41,158 @@ entry_size: int = 197  # Tamanho de cada entrada em bytes.
 # Índices em arquivo.
 app_id_index: str = "app_id_index.dat"  # Índice de ids de aplicativos.
 app_index_entry_size: int = 5  # Tamanho de cada entrada no índice de ids de aplicativo.
-date_index: str = "date_index.dat"  # Índice de datas de lançamento.
+date_index: str = "date_row_index.dat"  # Índice de datas de lançamento.
 date_index_entry_size: int = (
-    68  # Tamanho de cada entrada no índice de datas de lançamento.
+    8  # Tamanho de cada entrada no índice de datas de lançamento.
 )
 
 
+# Índices aprendidos (opcionais). Para usar, rode com `py main.py --learned`.
+use_learned_index: bool = "--learned" in sys.argv
+learned_max_error: int = 32  # Erro máximo (em entradas) garantido nas previsões.
+app_id_learned_index: str = "app_id_learned_index.dat"  # Segmentos do índice aprendido de app_ids.
+date_learned_index: str = "date_learned_index.dat"  # Segmentos do índice aprendido de datas.
+
+
+# Layout dividido em partes (opcional). Para usar, rode com `py main.py --sharded`.
+use_shards: bool = "--sharded" in sys.argv
+shard_count: int = 4  # Número de partes.
+shard_dir: str = "shards"  # Pasta com uma subpasta para cada parte.
+shard_routing_table: str = os.path.join(shard_dir, "routing.dat")  # Tabela de roteamento.
+developer_index_file: str = "developer_index.dat"  # Índice de desenvolvedores em arquivo.
+category_index_file: str = "category_index.dat"  # Índice de categorias em arquivo.
+key_index_entry_size: int = 68  # Tamanho de cada entrada nos índices de desenvolvedor e categoria.
+
+
+# Índices de desenvolvedores e de categorias ordenados por data de lançamento.
+developer_date_index: str = "developer_date_index.dat"  # Índice de (desenvolvedor, data).
+category_date_index: str = "category_date_index.dat"  # Índice de (categoria, data).
+key_date_index_entry_size: int = 72  # Tamanho de cada entrada nesses índices.
+
+
+export_dir: str = "exports"  # Pasta onde os resultados exportados são escritos.
+
+
+# Os processos criados com spawn (veja run_in_processes) importam este arquivo de novo
+# para achar as funções que vão rodar. Nesses processos, só as funções e as constantes
+# são definidas: os passos que criam os arquivos e os testes só rodam no processo
+# principal.
+is_main_process: bool = multiprocessing.current_process().name == "MainProcess"
+
+
+# Arquivos temporários e checkpoints da criação dos arquivos.
+temp_suffix: str = ".tmp"  # Sufixo dos arquivos que ainda estão sendo escritos.
+checkpoint_dir: str = "checkpoints"  # Pasta com as partições já ordenadas das ordenações externas.
+
+
+#################################
+## Escrita segura dos arquivos ##
+#################################
+
+# Cada passo abaixo só roda se o arquivo dele ainda não existir. Para isso funcionar
+# mesmo se o programa for interrompido no meio, todo arquivo é escrito primeiro com o
+# sufixo temp_suffix, e só é renomeado para o nome final (com os.replace, que é atômico)
+# depois de terminado. Assim, um arquivo com o nome final está sempre completo.
+# As ordenações externas guardam cada partição ordenada na pasta checkpoint_dir, numa
+# subpasta por arquivo de saída. Se o programa for interrompido, na próxima execução as
+# partições já prontas não são ordenadas de novo, desde que o arquivo de entrada da
+# ordenação não tenha mudado.
+# Ao iniciar, os arquivos temporários que sobraram de uma execução interrompida são
+# apagados, junto com os checkpoints de ordenações que já terminaram.
+
+
+# Abre um arquivo temporário para escrita, e quando a escrita termina sem erros, publica
+# ele com o nome final. Se der erro, o arquivo temporário é apagado.
+@contextlib.contextmanager
+def atomic_output(file_name: str, mode: str = "wb", **kwargs):
+    temp_file = file_name + temp_suffix
+    try:
+        with open(temp_file, mode, **kwargs) as output:
+            yield output
+            output.flush()
+            os.fsync(output.fileno())
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    os.replace(temp_file, file_name)
+
+
+# Pasta dos checkpoints da ordenação externa que gera o arquivo dado. O nome da pasta é o
+# caminho do arquivo codificado, para dar pra saber de qual arquivo ela é.
+def sort_checkpoint_dir(output_file: str) -> str:
+    return os.path.join(checkpoint_dir, urllib.parse.quote(output_file, safe=""))
+
+
+# Caminho da partição number de uma ordenação externa com partições de chunk_size.
+# O tamanho fica no nome para partições de um tamanho diferente não serem usadas.
+def sort_run_file(output_file: str, chunk_size: int, number: int) -> str:
+    return os.path.join(
+        sort_checkpoint_dir(output_file), f"{chunk_size}.run{number}"
+    )
+
+
+# Prepara a pasta de checkpoints da ordenação que gera output_file a partir de
+# source_file. A pasta guarda um manifesto com a identidade do arquivo de entrada
+# (caminho, tamanho e data de modificação) e o tamanho das partições. Se o manifesto
+# de uma execução interrompida não bater (por exemplo, porque o dataset foi gerado de
+# novo), as partições antigas são de outra entrada e são apagadas.
+def prepare_sort_checkpoint(output_file: str, source_file: str, chunk_size: int) -> None:
+    status = os.stat(source_file)
+    manifest = {
+        "source": os.path.abspath(source_file),
+        "size": status.st_size,
+        "mtime": status.st_mtime_ns,
+        "chunk_size": chunk_size,
+    }
+    manifest_file = os.path.join(sort_checkpoint_dir(output_file), "manifest.json")
+    try:
+        with open(manifest_file, "r", encoding="ascii") as file:
+            valid = json.load(file) == manifest
+    except (OSError, ValueError):
+        valid = False
+    if valid:
+        return
+
+    shutil.rmtree(sort_checkpoint_dir(output_file), ignore_errors=True)
+    os.makedirs(sort_checkpoint_dir(output_file))
+    with atomic_output(manifest_file, "w", encoding="ascii") as output:
+        json.dump(manifest, output)
+
+
+# Apaga só os arquivos temporários dos arquivos que este programa cria, para não mexer
+# em outros arquivos .tmp que estejam na mesma pasta.
+def remove_orphaned_files() -> None:
+    shard_files = [
+        os.path.join(shard_dir, f"shard_{shard}", file_name)
+        for shard in range(shard_count)
+        for file_name in (bin_data, date_index, developer_index_file, category_index_file)
+    ]
+    for file_name in [
+        csv_small,
+        csv_ordered,
+        bin_data,
+        app_id_index,
+        date_index,
+        app_id_learned_index,
+        date_learned_index,
+        developer_date_index,
+        category_date_index,
+        shard_routing_table,
+    ] + shard_files:
+        if os.path.exists(file_name + temp_suffix):
+            os.remove(file_name + temp_suffix)
+    for temp_file in glob.glob(os.path.join(checkpoint_dir, "*", "*" + temp_suffix)):
+        os.remove(temp_file)
+    for run_dir in glob.glob(os.path.join(checkpoint_dir, "*")):
+        if os.path.exists(urllib.parse.unquote(os.path.basename(run_dir))):
+            shutil.rmtree(run_dir)
+
+
+if is_main_process:
+    remove_orphaned_files()
+
+
 ########################
 ## Limpeza do dataset ##
 ########################
@@ -46,9 +204,9 @@ date_index_entry_size: int = (
 # de tamanhos fixos, transformando todas as strings em ASCII (para que cada caractere seja
 # um byte) e com limite de 64 caracteres, adicionando espaços caso necessário.
 
-if not os.path.exists(csv_small):
+if is_main_process and not os.path.exists(csv_small):
     print("Criando CSV reduzido...")
-    with open(csv_small, "w", encoding="ascii") as output:
+    with atomic_output(csv_small, "w", encoding="ascii") as output:
         csvwriter = csv.writer(output, lineterminator="\n")
         with open(csv_original, encoding="utf8") as csvfile:
             first_row = False
@@ -109,7 +267,7 @@ if not os.path.exists(csv_small):
 # de tratar cada arquivo temporário como uma fila, e só ir escrevendo os
 # valores menores, mas não consegui mesmo assim.
 
-if not os.path.exists(csv_ordered):
+if is_main_process and not os.path.exists(csv_ordered):
     print("Ordenando arquivo csv...")
 
     # Número máximo de bytes por arquivo.
@@ -124,20 +282,27 @@ if not os.path.exists(csv_ordered):
             yield chunk
 
     # Abre o CSV reduzido.
+    prepare_sort_checkpoint(csv_ordered, csv_small, chunk_size)
     with open(csv_small, "r", encoding="ascii") as file:
         temp_files: List[str] = []
 
         # Lê e ordena entradas em arquivos temporários.
         for chunk in read_entries(file, chunk_size):
-            reader = csv.reader(chunk)
+            temp_file = sort_run_file(csv_ordered, chunk_size, len(temp_files))
+            temp_files.append(temp_file)
+            rows = list(csv.reader(chunk))
+
+            # Partição já ordenada numa execução anterior, com as mesmas entradas.
+            if os.path.exists(temp_file):
+                with open(temp_file, "r", encoding="ascii") as temp:
+                    if sum(1 for _ in csv.reader(temp)) == len(rows):
+                        continue
 
             # A primeira coluna é a que tem o app_id, então é a chave da ordenação.
-            sorted_rows = sorted(reader, key=lambda row: row[0])
+            sorted_rows = sorted(rows, key=lambda row: row[0])
 
             # Escreve a partição ordenada no arquivo temporário.
-            temp_file = tempfile.NamedTemporaryFile(delete=False).name
-            temp_files.append(temp_file)
-            with open(temp_file, "w", encoding="ascii") as temp:
+            with atomic_output(temp_file, "w", encoding="ascii") as temp:
                 writer = csv.writer(temp, lineterminator="\n")
                 writer.writerows(sorted_rows)
 
@@ -145,16 +310,18 @@ if not os.path.exists(csv_ordered):
         # Todas essas funções usam "iterables", o que significa que
         # os dados não são todos carregados na memória ao mesmo tempo.
         # O carregamento e processamento são feitos item por item.
-        with open(csv_ordered, "w", encoding="ascii") as output:
-            merged_chunks = heapq.merge(
-                *[open(temp_file, "r", encoding="ascii") for temp_file in temp_files]
-            )
+        with atomic_output(csv_ordered, "w", encoding="ascii") as output:
+            chunk_files = [
+                open(temp_file, "r", encoding="ascii") for temp_file in temp_files
+            ]
+            merged_chunks = heapq.merge(*chunk_files)
             for chunk in merged_chunks:
                 output.write(chunk)
+            for chunk_file in chunk_files:
+                chunk_file.close()
 
         # Deleta os arquivos temporários.
-        for temp_file in temp_files:
-            os.remove(temp_file)
+        shutil.rmtree(sort_checkpoint_dir(csv_ordered))
 
 
 ################################
@@ -171,10 +338,10 @@ if not os.path.exists(csv_ordered):
 # Tecnicamente, como o arquivo tem entradas com tamanho fixo, eu não precisaria colocar
 # o \n no final como separador, mas o PDF especificando o trabalho pediu.
 
-if not os.path.exists(bin_data):
+if is_main_process and not os.path.exists(bin_data):
     print("Criando arquivo binário...")
 
-    with open(bin_data, "wb") as output:
+    with atomic_output(bin_data) as output:
         with open(csv_ordered, encoding="ascii") as csvfile:
             csvreader = csv.reader(csvfile)
             for row in csvreader:
@@ -206,7 +373,133 @@ if not os.path.exists(bin_data):
 # Este passo implementa e testa uma busca binária no arquivo binário recém-criado.
 
 
-# Função que decodifica uma entrada do arquivo binário.
+# Visão de uma entrada do arquivo binário que não decodifica nada quando é criada.
+# Ela só guarda um memoryview dos bytes da entrada, que aponta para o buffer lido do
+# arquivo sem copiar nada, e cada campo é decodificado só quando é acessado pela
+# primeira vez, e aí fica guardado. Os campos ainda não acessados simplesmente não
+# existem no objeto, por isso a leitura deles passa pelo AttributeError.
+# Com __slots__, cada objeto ocupa pouca memória e não tem um __dict__.
+# As comparações usam os bytes da chave (app_id), igual às buscas binárias, e dá pra
+# desempacotar a entrada igual a uma tupla:
+# app_id, category, developer_id, release_date = record
+@functools.total_ordering
+class Record(object):
+    __slots__ = (
+        "buffer",
+        "number",
+        "_key",
+        "_app_id",
+        "_category",
+        "_developer_id",
+        "_release_date",
+    )
+
+    def __init__(self, buffer: bytes | memoryview, number: int = -1):
+        self.buffer = memoryview(buffer)
+        self.number = number  # Posição da entrada no arquivo binário.
+
+    @property
+    def key(self) -> bytes:
+        try:
+            return self._key
+        except AttributeError:
+            self._key = bytes(self.buffer[:64])
+            return self._key
+
+    @property
+    def app_id(self) -> str:
+        try:
+            return self._app_id
+        except AttributeError:
+            self._app_id = str(self.buffer[:64], "ascii").strip()
+            return self._app_id
+
+    @property
+    def category(self) -> str:
+        try:
+            return self._category
+        except AttributeError:
+            self._category = str(self.buffer[64:128], "ascii").strip()
+            return self._category
+
+    @property
+    def developer_id(self) -> str:
+        try:
+            return self._developer_id
+        except AttributeError:
+            self._developer_id = str(self.buffer[128:192], "ascii").strip()
+            return self._developer_id
+
+    @property
+    def release_timestamp(self) -> int:
+        return int.from_bytes(self.buffer[192:196], "little", signed=False)
+
+    @property
+    def release_date(self) -> Optional[datetime.datetime]:
+        try:
+            return self._release_date
+        except AttributeError:
+            timestamp = self.release_timestamp
+            self._release_date = (
+                datetime.datetime.fromtimestamp(timestamp) if timestamp > 0 else None
+            )
+            return self._release_date
+
+    def fields(
+        self,
+    ) -> Tuple[str, str, str, Optional[datetime.datetime]]:
+        return self.app_id, self.category, self.developer_id, self.release_date
+
+    def __iter__(self):
+        return iter(self.fields())
+
+    def __getitem__(self, index: int):
+        return self.fields()[index]
+
+    def __len__(self) -> int:
+        return 4
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            return self.key == other.key
+        if isinstance(other, bytes):
+            return self.key == other
+        return NotImplemented
+
+    def __lt__(self, other) -> bool:
+        if isinstance(other, Record):
+            return self.key < other.key
+        if isinstance(other, bytes):
+            return self.key < other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"Record({self.app_id!r}, number={self.number})"
+
+
+# Função que passa por todas as entradas do arquivo binário, lendo blocos grandes de uma
+# vez. Cada entrada vira um Record que aponta para o bloco lido, sem cópias.
+# Por padrão lê o arquivo binário principal, mas pode ler outro no mesmo formato.
+def scan_records(
+    block_entries: int = 4096, file_name: str = bin_data
+) -> Iterable[Record]:
+    with open(file_name, "rb") as file:
+        number = 0
+        while True:
+            block = file.read(entry_size * block_entries)
+            if not block:
+                break
+            view = memoryview(block)
+            # Um pedaço de entrada no fim de um arquivo incompleto não é uma entrada.
+            for offset in range(0, len(view) - entry_size + 1, entry_size):
+                yield Record(view[offset : offset + entry_size], number)
+                number += 1
+
+
+# Função que decodifica uma entrada do arquivo binário de uma vez.
 # Recebe bytes e devolve uma lista com cada campo decodificado, e as strings com os
 # espaços extra removidos.
 def decode_entry(
@@ -216,39 +509,32 @@ def decode_entry(
 ]:
     if not entry:
         return None
-    app_id = entry[:64].decode("ascii").strip()
-    category = entry[64:128].decode("ascii").strip()
-    developer_id = entry[128:192].decode("ascii").strip()
-    release_date_timestamp = int.from_bytes(entry[192:196], "little", signed=False)
-    release_date = (
-        datetime.datetime.fromtimestamp(release_date_timestamp)
-        if release_date_timestamp > 0
-        else None
-    )
-    return app_id, category, developer_id, release_date
+    return Record(entry).fields()
+
+
+# Contador de leituras feitas durante as buscas, usado para comparar a busca binária
+# com o índice aprendido.
+search_probes: Dict[str, int] = {"count": 0}
 
 
 # Função de busca binária.
 # Recebe uma chave (app_id) para pesquisar, e, opcionalmente, uma entrada mínima e máxima
-# para a busca.
-# Caso encontrar, retorna uma lista com a entrada decodificada, e a sua posição na lista de entradas.
+# para a busca, e o arquivo (por padrão, o arquivo binário principal).
+# Caso encontrar, retorna a entrada (como Record), e a sua posição na lista de entradas.
 def binary_search_in_datafile(
     target_key: str,
     starting_lower_bound: int = 0,
     starting_upper_bound: int = -1,
-) -> Tuple[
-    Tuple[Optional[str], Optional[str], Optional[str], Optional[datetime.datetime]]
-    | None,
-    int,
-]:
+    file_name: str = bin_data,
+) -> Tuple[Optional[Record], int]:
     # Pega o tamanho do arquivo e divide para obter a quantidade de entradas.
-    file_size: int = os.path.getsize(bin_data)
+    file_size: int = os.path.getsize(file_name)
     last_entry: int = file_size // entry_size
 
     # Codifica a chave de busca para comparar com as chaves do arquivo.
     encoded_key = target_key.lower().encode("ascii").ljust(64, b" ")[:64]
 
-    with open(bin_data, "rb") as file:
+    with open(file_name, "rb") as file:
         lower_bound: int = starting_lower_bound
         upper_bound: int = (
             last_entry if starting_upper_bound == -1 else starting_upper_bound
@@ -264,11 +550,12 @@ def binary_search_in_datafile(
             # Vai até a posição em bytes do arquivo em que a entrada do meio está, e lê.
             file.seek(midpoint * entry_size)
             entry = file.read(entry_size)
+            search_probes["count"] += 1
 
             # Extrai a chave para comparação.
             key = entry[:64]
             if key == encoded_key:
-                return decode_entry(entry), midpoint
+                return Record(entry, midpoint), midpoint
 
             if key < encoded_key:
                 lower_bound = midpoint
@@ -280,24 +567,25 @@ def binary_search_in_datafile(
 
 
 # Teste da função.
-print("##############################")
-print("## Busca binária no arquivo ##")
-print("##############################")
-
-# Obtém informações sobre o aplicativo "Fruit Ninja Classic".
-app_id = "com.halfbrick.fruitninja"
-print(f"Procurando aplicativo com id {app_id}")
-result, position = binary_search_in_datafile(app_id)
-
-if result:
-    app_id, category, developer_id, release_date = result
-    print("Aplicativo encontrado!")
-    print(f"App ID: {app_id}")
-    print(f"Categoria: {category}")
-    print(f"Desenvolvedor: {developer_id}")
-    print(f"Data de lançamento: {release_date}")
-else:
-    print(f"Entrada não encontrada, posição do último item checado: {position}.")
+if is_main_process:
+    print("##############################")
+    print("## Busca binária no arquivo ##")
+    print("##############################")
+
+    # Obtém informações sobre o aplicativo "Fruit Ninja Classic".
+    app_id = "com.halfbrick.fruitninja"
+    print(f"Procurando aplicativo com id {app_id}")
+    result, position = binary_search_in_datafile(app_id)
+
+    if result:
+        app_id, category, developer_id, release_date = result
+        print("Aplicativo encontrado!")
+        print(f"App ID: {app_id}")
+        print(f"Categoria: {category}")
+        print(f"Desenvolvedor: {developer_id}")
+        print(f"Data de lançamento: {release_date}")
+    else:
+        print(f"Entrada não encontrada, posição do último item checado: {position}.")
 
 ######################
 ## Índice de App ID ##
@@ -311,20 +599,19 @@ else:
 # Função que obtém uma entrada de acordo com a posição dela no arquivo binário.
 def get_entry_by_number(
     number: int,
-) -> Optional[
-    Tuple[Optional[str], Optional[str], Optional[str], Optional[datetime.datetime]]
-]:
+) -> Optional[Record]:
     if number < 0:
         return None
     with open(bin_data, "rb") as file:
         file.seek(number * entry_size)
-        return decode_entry(file.read(entry_size))
+        entry = file.read(entry_size)
+        return Record(entry, number) if len(entry) == entry_size else None
 
 
 # Criando o índice.
-if not os.path.exists(app_id_index):
+if is_main_process and not os.path.exists(app_id_index):
     print("Criando arquivo de índice de app id...")
-    with open(app_id_index, "wb") as output:
+    with atomic_output(app_id_index) as output:
         letters = "abcdefghijklmnopqrstuvwxyz"
         with open(bin_data, "rb") as file:
             entry_number = 0
@@ -345,9 +632,10 @@ if not os.path.exists(app_id_index):
 # Realiza busca binária no índice de app_ids.
 # Exatamente a mesma lógica da função de busca binária anterior, mas ao invés
 # de ser direto no arquivo binário, é feito no índice.
-# Aceita um app_id como entrada, e retorna a posição do primeiro e último
-# itens que começam com a mesma primeira letra que o app_id dado, para reduzir
-# os itens que devem ser buscados na busca binária pelo arquivo.
+# Aceita um app_id como entrada, e retorna a posição do primeiro item que começa com a
+# mesma primeira letra que o app_id dado, e a posição logo depois do último (que é o
+# limite superior usado pela busca binária no arquivo), para reduzir os itens que devem
+# ser buscados na busca binária pelo arquivo.
 def binary_search_in_appid_index(
     target_key: str,
 ) -> Tuple[int, int]:
@@ -368,13 +656,14 @@ def binary_search_in_appid_index(
             last_midpoint = midpoint
             file.seek(midpoint * app_index_entry_size)
             entry = file.read(app_index_entry_size)
+            search_probes["count"] += 1
 
             key = entry[0]
             if key == encoded_key:
                 file.seek((midpoint + 1) * app_index_entry_size)
                 upper_bound_entry = file.read(app_index_entry_size)
                 return int.from_bytes(entry[1:5], "little", signed=False), (
-                    (int.from_bytes(upper_bound_entry[1:5], "little", signed=False) - 1)
+                    int.from_bytes(upper_bound_entry[1:5], "little", signed=False)
                     if upper_bound_entry
                     else -1
                 )
@@ -389,220 +678,705 @@ def binary_search_in_appid_index(
         return 0, -1
 
 
+# Modelo do índice aprendido: erro máximo, e para cada segmento a chave inicial, a
+# posição inicial e a inclinação da reta.
+LearnedModel = Tuple[int, List[int], List[int], List[float]]
+
+# Modelo do índice aprendido de app_ids. Só é carregado mais abaixo, na seção dos
+# índices aprendidos, se esse modo estiver ativado.
+learned_app_id_model: Optional[LearnedModel] = None
+
+
 # Função que usa busca binária em ambos o índice e o arquivo binário
 # para obter uma entrada de acordo com o app_id fornecido.
-# Retorna a entrada decodificada.
+# Se o índice aprendido estiver carregado, usa ele no lugar das buscas binárias.
+# Retorna a entrada (como Record).
 def get_entry_by_app_id(
     app_id: str,
-) -> Optional[
-    Tuple[Optional[str], Optional[str], Optional[str], Optional[datetime.datetime]]
-]:
+) -> Optional[Record]:
+    if learned_app_id_model is not None:
+        result, _ = learned_search_in_datafile(app_id)
+        return result
     lower, upper = binary_search_in_appid_index(app_id)
     result, _ = binary_search_in_datafile(app_id, lower, upper)
     return result
 
 
 # Teste da função.
-print("###################################")
-print("## Busca de app id usando índice ##")
-print("###################################")
-
-# Pesquisa informações do aplicativo "Roblox".
-app_id = "com.roblox.client"
-print(f"Procurando aplicativo com id {app_id} usando o índice de chave primária.")
-result = get_entry_by_app_id(app_id)
-if result:
-    app_id, category, developer_id, release_date = result
-    print("Aplicativo encontrado!")
-    print(f"ID: {app_id}")
-    print(f"Categoria: {category}")
-    print(f"Desenvolvedor: {developer_id}")
-    print(f"Data de lançamento: {release_date}")
-else:
-    print("Aplicativo não encontrado.")
+if is_main_process:
+    print("###################################")
+    print("## Busca de app id usando índice ##")
+    print("###################################")
+
+    # Pesquisa informações do aplicativo "Roblox".
+    app_id = "com.roblox.client"
+    print(f"Procurando aplicativo com id {app_id} usando o índice de chave primária.")
+    result = get_entry_by_app_id(app_id)
+    if result:
+        app_id, category, developer_id, release_date = result
+        print("Aplicativo encontrado!")
+        print(f"ID: {app_id}")
+        print(f"Categoria: {category}")
+        print(f"Desenvolvedor: {developer_id}")
+        print(f"Data de lançamento: {release_date}")
+    else:
+        print("Aplicativo não encontrado.")
 
 
 ##################################
 ## Índice de data de lançamento ##
 ##################################
 
-# Cria mais um CSV ordenado por data de lançamento, e depois converte para um novo arquivo
-# binário, com o seguinte formato:
+# Cria um índice binário ordenado por data de lançamento, com o seguinte formato:
 # Data de lançamento (unix timestamp, uint32 little endian, 4 bytes) +
-# App ID (64 bytes ASCII)
-# Então, cada item nesse índice tem 68 bytes.
+# Número da entrada no arquivo binário (uint32 little endian, 4 bytes)
+# Então, cada item nesse índice tem 8 bytes.
 # Esse índice serve para consultas em relação à data de lançamento dos aplicativos, como
 # quais aplicativos foram lançados em um dia específico, ou quantas entradas não fornecem
 # essa informação.
+# Como o índice guarda o número da entrada, e não o app_id, cada resultado é obtido com
+# uma única leitura direta no arquivo binário, sem precisar de outra busca binária.
+# A ordenação é feita pelos pares (data, número) como inteiros. Antes eu ordenava a
+# coluna da data do CSV como string, e datas com quantidades diferentes de dígitos
+# ficavam fora de ordem.
 
-if not os.path.exists(date_index):
-    print("Criando índice de data...")
 
-    input_file = csv_ordered
-    output_file = csv_ordered_time
-
-    sort_column_index = 3
-
-    chunk_size = 100000
-
-    # Ordena e combina os arquivos.
-    def sort_and_merge(input_files, output_file):
-        with open(output_file, "w", newline="") as output_fh:
-            writer = csv.writer(output_fh)
-
-            # Aqui, o programa usa a heap diretamente para manter os arquivos em ordem.
-            # Não tenho certeza do porquê, mas para esses dados, simplesmente usar
-            # heapq.merge não ordenou corretamente.
-            heap = []
-            for file in input_files:
-                reader = csv.reader(file)
-                row = next(reader, None)
-                if row is not None:
-                    heapq.heappush(heap, (row, reader, file))
-
-            while heap:
-                row, reader, file = heapq.heappop(heap)
-                writer.writerow(row)
-                next_row = next(reader, None)
-                if next_row is not None:
-                    heapq.heappush(heap, (next_row, reader, file))
-                else:
-                    file.close()
-
-    # Lê e ordena o arquivo de dados em partições.
-    with open(input_file, "r") as input_fh:
-        reader = csv.reader(input_fh)
-        chunks = []
-        for i, chunk in enumerate(iter(lambda: list(csv.reader(input_fh)), [])):
-            chunk.sort(key=lambda row: row[sort_column_index])
-            temp_file = tempfile.NamedTemporaryFile(delete=False)
-            with open(temp_file.name, "w", newline="") as temp_fh:
-                writer = csv.writer(temp_fh)
-                writer.writerows(chunk)
-            chunks.append(temp_file)
-
-        # Ordena as partições de 2 em 2 até terminar.
-        while len(chunks) > 1:
-            new_chunks = []
-            for i in range(0, len(chunks), 2):
-                if i + 1 < len(chunks):
-                    temp_file = tempfile.NamedTemporaryFile(delete=False)
-                    sort_and_merge([chunks[i], chunks[i + 1]], temp_file.name)
-                    new_chunks.append(temp_file)
-                else:
-                    new_chunks.append(chunks[i])
-            chunks = new_chunks
+# Converte um par (data, número da entrada) para o formato do índice.
+def encode_date_index_entry(timestamp: int, number: int) -> bytes:
+    return timestamp.to_bytes(4, "little", signed=False) + number.to_bytes(
+        4, "little", signed=False
+    )
 
-        # Escreve no arquivo final.
-        with open(output_file, "w", newline="") as output_fh:
-            writer = csv.writer(output_fh)
 
-            for chunk in chunks:
-                with open(chunk.name, "r") as chunk_fh:
-                    reader = csv.reader(chunk_fh)
-                    writer.writerows(reader)
+# Função pra ler os pares (data, número da entrada) de um arquivo no formato do índice.
+def read_date_index_entries(file_name: str) -> Iterable[Tuple[int, int]]:
+    with open(file_name, "rb") as file:
+        while True:
+            block = file.read(date_index_entry_size * 4096)
+            if not block:
+                break
+            for offset in range(0, len(block), date_index_entry_size):
+                yield (
+                    int.from_bytes(block[offset : offset + 4], "little", signed=False),
+                    int.from_bytes(
+                        block[offset + 4 : offset + 8], "little", signed=False
+                    ),
+                )
 
-            # Remove arquivos temporários.
-            for chunk in chunks:
-                chunk.close()
-                os.remove(chunk.name)
 
-    input_file = csv_ordered_time
-    output_file = date_index
+# Ordenação externa de tuplas. Lê as tuplas em partições, ordena cada partição em
+# memória e escreve em arquivos temporários, usando encode para converter cada tupla
+# em bytes. Assim como na ordenação do CSV, os arquivos temporários são combinados
+# depois com o heapq.merge, usando read para ler as tuplas de volta.
+# Os arquivos temporários ficam na pasta de checkpoints, e as partições que já existirem
+# lá (de uma execução interrompida sobre o mesmo source_file) não são ordenadas de novo.
+def external_sort(
+    items: Iterable[Tuple],
+    output_file: str,
+    encode: Callable[..., bytes],
+    read: Callable[[str], Iterable[Tuple]],
+    source_file: str,
+    chunk_entries: int = 500000,
+) -> None:
+    prepare_sort_checkpoint(output_file, source_file, chunk_entries)
+    temp_files: List[str] = []
+    items = iter(items)
+    while True:
+        temp_file = sort_run_file(output_file, chunk_entries, len(temp_files))
+        chunk = list(itertools.islice(items, chunk_entries))
+        if not chunk:
+            break
+        temp_files.append(temp_file)
+
+        # Partição já ordenada numa execução anterior, com as mesmas tuplas: só pula elas.
+        if os.path.exists(temp_file) and sum(1 for _ in read(temp_file)) == len(chunk):
+            continue
+
+        chunk.sort()
+        with atomic_output(temp_file) as temp:
+            temp.write(b"".join(encode(*item) for item in chunk))
+
+    # Combina as partições no arquivo final.
+    with atomic_output(output_file) as output:
+        for item in heapq.merge(*[read(temp_file) for temp_file in temp_files]):
+            output.write(encode(*item))
+
+    # Deleta os arquivos temporários.
+    shutil.rmtree(sort_checkpoint_dir(output_file))
+
+
+# Cria o índice de datas de um arquivo binário.
+def build_date_index(data_file: str, output_file: str) -> None:
+    external_sort(
+        (
+            (record.release_timestamp, record.number)
+            for record in scan_records(file_name=data_file)
+        ),
+        output_file,
+        encode_date_index_entry,
+        read_date_index_entries,
+        data_file,
+    )
 
-    # Converte o CSV ordenado por data para o formato binário.
-    with open(input_file, "r") as csv_file, open(output_file, "wb") as binary_file:
-        csv_reader = csv.reader(csv_file)
 
-        for row in csv_reader:
-            release_date = int(row[3]).to_bytes(4, "little", signed=False)
-            app_id = row[0].encode("ascii")
+if is_main_process and not os.path.exists(date_index):
+    print("Criando índice de data...")
+    build_date_index(bin_data, date_index)
 
-            binary_file.write(release_date + app_id)
+
+# Função que obtém várias entradas de acordo com as posições delas no arquivo binário.
+# Abre o arquivo uma vez só, e faz uma leitura direta para cada entrada.
+# Assim como em get_entry_by_number, números que não são de nenhuma entrada não têm
+# resultado, então eles são pulados.
+def get_entries_by_numbers(
+    numbers: Iterable[int],
+) -> List[Record]:
+    result = []
+    with open(bin_data, "rb") as file:
+        for number in numbers:
+            if number < 0:
+                continue
+            file.seek(number * entry_size)
+            entry = file.read(entry_size)
+            if len(entry) == entry_size:
+                result.append(Record(entry, number))
+    return result
 
 
-# Recebe uma data em formato unix timestamp e retorna uma lista de app_ids de
-# aplicativos lançados naquele dia usando pesquisa binária.
-def binary_search_in_date_index(
-    target_key: int,
-) -> list[str]:
-    file_size: int = os.path.getsize(date_index)
+# Busca binária que retorna a posição do primeiro item do índice de datas com data maior
+# ou igual à data dada. Se todas as datas forem menores, retorna o número de itens.
+def lower_bound_in_date_index(target_key: int, file_name: str = date_index) -> int:
+    file_size: int = os.path.getsize(file_name)
     last_entry: int = file_size // date_index_entry_size
 
-    with open(date_index, "rb") as file:
+    with open(file_name, "rb") as file:
         lower_bound: int = 0
         upper_bound: int = last_entry
-        last_midpoint: int = -1
 
-        while True:
+        while lower_bound < upper_bound:
             midpoint: int = (lower_bound + upper_bound) // 2
-            if midpoint == last_midpoint:
-                break
-            last_midpoint = midpoint
             file.seek(midpoint * date_index_entry_size)
+            key = int.from_bytes(file.read(4), "little", signed=False)
+            search_probes["count"] += 1
+            if key < target_key:
+                lower_bound = midpoint + 1
+            else:
+                upper_bound = midpoint
+
+        return lower_bound
+
+
+# Modelo do índice aprendido de datas, carregado junto com o de app_ids.
+learned_date_model: Optional[LearnedModel] = None
+
+
+# Retorna a posição do primeiro item do índice de datas com data maior ou igual à data
+# dada, usando a busca binária, ou o índice aprendido se ele estiver carregado.
+def find_first_in_date_index(target_key: int) -> int:
+    if learned_date_model is not None:
+        return learned_lower_bound_in_date_index(target_key)
+    return lower_bound_in_date_index(target_key)
+
+
+# Recebe uma data em formato unix timestamp e retorna uma lista com os números das
+# entradas do arquivo binário de aplicativos lançados naquele dia.
+def binary_search_in_date_index(
+    target_key: int,
+) -> list[int]:
+    first = find_first_in_date_index(target_key)
+    result = []
+    with open(date_index, "rb") as file:
+        file.seek(first * date_index_entry_size)
+        # Vá para frente até achar a próxima entrada que NÃO tem essa data, ou seja,
+        # a data que vem depois dessa, e vá adicionando todos os números ao resultado.
+        while True:
             entry = file.read(date_index_entry_size)
+            if not entry:
+                break
             key = int.from_bytes(entry[0:4], "little", signed=False)
+            if key != target_key:
+                break
+            result.append(int.from_bytes(entry[4:8], "little", signed=False))
+    return result
+
+
+# Função que retorna uma lista de aplicativos lançados no dia, mês e ano dados.
+def entries_released_in_date(day: int, month: int, year: int) -> List[Record]:
+    return get_entries_by_numbers(
+        binary_search_in_date_index(
+            int(datetime.datetime(year, month, day).timestamp())
+        )
+    )
+
+
+# Função que retorna uma lista de aplicativos sem data de lançamento especificada.
+def entries_with_no_date() -> List[Record]:
+    return get_entries_by_numbers(binary_search_in_date_index(0))
+
+
+# Paginação dos resultados.
+# As funções acima montam a lista inteira, o que para uma data com muitos aplicativos
+# (ou para os aplicativos sem data) ocupa muita memória de uma vez. As funções iter_*
+# são geradores que devolvem os resultados um por um, junto com um cursor, e as funções
+# page_* devolvem uma página de resultados e o cursor da próxima página (ou None se
+# acabou). O cursor é só um número (aqui, a posição no índice de datas) que o cliente
+# devolve para continuar de onde parou, sem precisar refazer os resultados anteriores.
+# Como o cursor vem do cliente, ele é conferido antes de ser usado.
+
+
+# Confere se o cursor recebido do cliente é uma posição válida numa lista de size itens.
+def check_cursor(cursor: int, size: int) -> None:
+    if not 0 <= cursor <= size:
+        raise ValueError(f"Cursor {cursor} fora do intervalo de 0 a {size}.")
+
+
+# Monta uma página com os primeiros page_size itens de positions, que devolve pares
+# (cursor, item) sem ler as entradas. Só os itens da página são passados para fetch,
+# que lê as entradas deles. O cursor da próxima página é o do item seguinte, que só é
+# olhado, e não lido, ou None se os itens acabaram.
+def paginate(
+    positions: Iterable[Tuple[int, object]],
+    fetch: Callable[[list], List[Record]],
+    page_size: int,
+) -> Tuple[List[Record], Optional[int]]:
+    items: list = []
+    for cursor, item in positions:
+        if len(items) == page_size:
+            return fetch(items), cursor
+        items.append(item)
+    return fetch(items), None
+
+
+# Devolve as posições no índice de datas e os números das entradas com a data dada, a
+# partir da posição do cursor (ou da primeira entrada com essa data, se não tiver cursor).
+def date_index_positions(
+    target_key: int, cursor: Optional[int] = None
+) -> Iterable[Tuple[int, int]]:
+    if cursor is None:
+        position = find_first_in_date_index(target_key)
+    else:
+        check_cursor(cursor, os.path.getsize(date_index) // date_index_entry_size)
+        position = cursor
+    with open(date_index, "rb") as index_file:
+        index_file.seek(position * date_index_entry_size)
+        while True:
+            block = index_file.read(date_index_entry_size * 512)
+            if not block:
+                return
+            for offset in range(0, len(block), date_index_entry_size):
+                key = int.from_bytes(block[offset : offset + 4], "little", signed=False)
+                if key != target_key:
+                    return
+                yield position, int.from_bytes(
+                    block[offset + 4 : offset + 8], "little", signed=False
+                )
+                position += 1
+
+
+# Devolve as entradas com a data dada, junto com as posições delas no índice de datas.
+def iter_date_index(
+    target_key: int, cursor: Optional[int] = None
+) -> Iterable[Tuple[int, Record]]:
+    with open(bin_data, "rb") as data_file:
+        for position, number in date_index_positions(target_key, cursor):
+            data_file.seek(number * entry_size)
+            entry = data_file.read(entry_size)
+            if len(entry) == entry_size:
+                yield position, Record(entry, number)
+
+
+def iter_entries_released_in_date(
+    day: int, month: int, year: int, cursor: Optional[int] = None
+) -> Iterable[Tuple[int, Record]]:
+    return iter_date_index(
+        int(datetime.datetime(year, month, day).timestamp()), cursor
+    )
+
+
+def iter_entries_with_no_date(
+    cursor: Optional[int] = None,
+) -> Iterable[Tuple[int, Record]]:
+    return iter_date_index(0, cursor)
+
+
+def page_entries_released_in_date(
+    day: int,
+    month: int,
+    year: int,
+    cursor: Optional[int] = None,
+    page_size: int = 100,
+) -> Tuple[List[Record], Optional[int]]:
+    return paginate(
+        date_index_positions(
+            int(datetime.datetime(year, month, day).timestamp()), cursor
+        ),
+        get_entries_by_numbers,
+        page_size,
+    )
+
 
-            # Após achar uma entrada com essa data...
-            if key == target_key:
-                # Volte para trás até achar uma entrada que NÃO tem essa data.
-                while key == target_key and midpoint > 0:
-                    midpoint -= 1
-                    file.seek(midpoint * date_index_entry_size)
-                    entry = file.read(date_index_entry_size)
-                    key = int.from_bytes(entry[0:4], "little", signed=False)
-
-                result = []
-                # Adicione ao resultado o primeiro app_id do arquivo, se estivermos nele.
-                if midpoint == 0:
-                    result.append(entry[4:].decode("ascii"))
-                midpoint += 1
-                file.seek(midpoint * date_index_entry_size)
-                entry = file.read(date_index_entry_size)
-                key = int.from_bytes(entry[0:4], "little", signed=False)
-
-                # Vá para frente até achar a próxima entrada que NÃO tem essa data, ou seja,
-                # a data que vem depois dessa, e vá adicionando todos os IDs ao resultado.
-                while key == target_key and midpoint < last_entry:
-                    midpoint += 1
-                    file.seek(midpoint * date_index_entry_size)
-                    entry = file.read(date_index_entry_size)
-                    key = int.from_bytes(entry[0:4], "little", signed=False)
-                    result.append(entry[4:].decode("ascii"))
-                return result
-            elif key < target_key:
+def page_entries_with_no_date(
+    cursor: Optional[int] = None, page_size: int = 100
+) -> Tuple[List[Record], Optional[int]]:
+    return paginate(date_index_positions(0, cursor), get_entries_by_numbers, page_size)
+
+
+# Teste das funções.
+if is_main_process:
+    print("##################################")
+    print("## Índice de data de lançamento ##")
+    print("##################################")
+
+    # Quantos aplicativos foram lançados em 1/1/2020?
+    print(
+        f"{len(entries_released_in_date(1, 1, 2020))} aplicativos foram lançados no dia 1 de janeiro de 2020."
+    )
+    # Quantos aplicativos não tem data de lançamento?
+    print(
+        f"Há {len(entries_with_no_date())} aplicativos sem data de lançamento registrada."
+    )
+    # Lendo os aplicativos sem data em páginas.
+    pages = 0
+    paged_entries = 0
+    page, cursor = page_entries_with_no_date(page_size=250)
+    while True:
+        pages += 1
+        paged_entries += len(page)
+        if cursor is None:
+            break
+        page, cursor = page_entries_with_no_date(cursor, page_size=250)
+    print(
+        f"Lidos {paged_entries} aplicativos sem data em {pages} páginas de até 250 aplicativos."
+    )
+
+#######################
+## Índices aprendidos ##
+#######################
+
+# Modo opcional que troca as buscas binárias por um índice "aprendido". Como os app_ids
+# e as datas estão ordenados e distribuídos de forma bem suave nos arquivos, dá pra
+# aproximar a posição de cada chave com algumas retas (segmentos lineares), e depois só
+# procurar numa janela pequena em volta da posição prevista.
+# Os segmentos são ajustados na criação do índice com um erro máximo garantido, e são
+# salvos num arquivo pequeno, com o seguinte formato:
+# Erro máximo (uint32 little endian, 4 bytes), e para cada segmento:
+# Chave inicial (64 bytes ASCII para app_ids, ou uint32 little endian para datas) +
+# Posição inicial (uint32 little endian, 4 bytes) +
+# Inclinação da reta (float64 little endian, 8 bytes)
+# Para transformar um app_id em número, os 64 bytes são lidos como um inteiro big endian,
+# o que mantém a mesma ordem da comparação de bytes.
+
+
+# Ajusta segmentos lineares sobre pontos (chave, posição) em ordem crescente de chave,
+# de forma que a posição prevista de cada ponto fique a no máximo max_error entradas
+# da posição real. Cada segmento começa em um ponto e guarda o intervalo de inclinações
+# que ainda atende todos os pontos vistos (um "cone" que vai encolhendo). Quando um ponto
+# novo não cabe no intervalo, o segmento é fechado e outro começa nesse ponto.
+# Chaves repetidas usam a posição da primeira ocorrência.
+def fit_segments(
+    points: Iterable[Tuple[int, int]], max_error: int
+) -> List[Tuple[int, int, float]]:
+    segments: List[Tuple[int, int, float]] = []
+    start_key: Optional[int] = None
+    start_position: int = 0
+    last_key: Optional[int] = None
+    min_slope: float = 0.0
+    max_slope: float = float("inf")
+
+    for key, position in points:
+        if key == last_key:
+            continue
+        last_key = key
+        if start_key is not None:
+            distance = key - start_key
+            slope = (position - start_position) / distance
+            if min_slope <= slope <= max_slope:
+                min_slope = max(
+                    min_slope, (position - max_error - start_position) / distance
+                )
+                max_slope = min(
+                    max_slope, (position + max_error - start_position) / distance
+                )
+                continue
+            segments.append(
+                (
+                    start_key,
+                    start_position,
+                    (min_slope + max_slope) / 2,
+                )
+            )
+        # Começa um segmento novo.
+        start_key, start_position = key, position
+        min_slope, max_slope = 0.0, float("inf")
+
+    if start_key is not None:
+        segments.append(
+            (
+                start_key,
+                start_position,
+                (min_slope + max_slope) / 2 if max_slope != float("inf") else 0.0,
+            )
+        )
+    return segments
+
+
+# Escreve os segmentos no arquivo do índice aprendido.
+def write_learned_index(
+    file_name: str,
+    segments: List[Tuple[int, int, float]],
+    max_error: int,
+    key_size: int,
+    byteorder: str,
+) -> None:
+    with atomic_output(file_name) as output:
+        output.write(max_error.to_bytes(4, "little", signed=False))
+        for key, position, slope in segments:
+            output.write(
+                key.to_bytes(key_size, byteorder, signed=False)
+                + position.to_bytes(4, "little", signed=False)
+                + struct.pack("<d", slope)
+            )
+
+
+# Carrega os segmentos do arquivo do índice aprendido para a memória.
+def load_learned_index(file_name: str, key_size: int, byteorder: str) -> LearnedModel:
+    keys: List[int] = []
+    positions: List[int] = []
+    slopes: List[float] = []
+    segment_size = key_size + 12
+    with open(file_name, "rb") as file:
+        max_error = int.from_bytes(file.read(4), "little", signed=False)
+        data = file.read()
+    for offset in range(0, len(data), segment_size):
+        keys.append(
+            int.from_bytes(data[offset : offset + key_size], byteorder, signed=False)
+        )
+        positions.append(
+            int.from_bytes(
+                data[offset + key_size : offset + key_size + 4], "little", signed=False
+            )
+        )
+        slopes.append(
+            struct.unpack("<d", data[offset + key_size + 4 : offset + segment_size])[0]
+        )
+    return max_error, keys, positions, slopes
+
+
+# Prevê a posição de uma chave usando o segmento que começa na maior chave menor ou
+# igual a ela.
+def predict_position(model: LearnedModel, key: int) -> int:
+    _, keys, positions, slopes = model
+    segment = max(bisect.bisect_right(keys, key) - 1, 0)
+    return positions[segment] + round(slopes[segment] * (key - keys[segment]))
+
+
+# Busca local em volta da posição prevista. Retorna a posição da primeira entrada com
+# chave maior ou igual à chave dada (ou o número de entradas, se não houver).
+# Primeiro faz uma busca binária só na janela do erro máximo. Se o resultado cair na
+# borda da janela, confere a entrada vizinha, e se a janela não tiver a resposta
+# (o que pode acontecer com chaves que não estão no arquivo), ela é aumentada
+# exponencialmente para o lado certo. Assim o resultado é sempre igual ao da busca
+# binária completa.
+def bounded_lower_bound(
+    read_key: Callable[[int], object],
+    last_entry: int,
+    target_key: object,
+    predicted: int,
+    max_error: int,
+) -> int:
+    step = max_error + 1
+    lower = min(max(predicted - step, 0), last_entry)
+    upper = min(max(predicted + step + 1, lower), last_entry)
+
+    while True:
+        lower_bound, upper_bound = lower, upper
+        while lower_bound < upper_bound:
+            midpoint = (lower_bound + upper_bound) // 2
+            if read_key(midpoint) < target_key:
                 lower_bound = midpoint + 1
             else:
                 upper_bound = midpoint
 
-        return []
+        if lower_bound == lower and lower > 0 and read_key(lower - 1) >= target_key:
+            upper = lower
+            lower = max(lower - step, 0)
+        elif (
+            lower_bound == upper and upper < last_entry and read_key(upper) < target_key
+        ):
+            lower = upper
+            upper = min(upper + step, last_entry)
+        else:
+            return lower_bound
+        step *= 2
 
 
-# Função que retorna uma lista de app_ids de aplicativos lançados no dia, mês e ano dados.
-def entries_released_in_date(day: int, month: int, year: int) -> list[str]:
-    return binary_search_in_date_index(
-        int(datetime.datetime(year, month, day).timestamp())
-    )
+# Mesma coisa que a função binary_search_in_datafile, mas usando o índice aprendido.
+# Retorna a entrada (como Record) e a sua posição, ou None e a posição em que ela estaria.
+def learned_search_in_datafile(
+    target_key: str,
+) -> Tuple[Optional[Record], int]:
+    max_error = learned_app_id_model[0]
+    last_entry: int = os.path.getsize(bin_data) // entry_size
+    encoded_key = target_key.lower().encode("ascii").ljust(64, b" ")[:64]
 
+    with open(bin_data, "rb") as file:
+        # Guarda as entradas lidas durante a busca, para não ler de novo a encontrada.
+        read_entries: Dict[int, bytes] = {}
+
+        def read_key(number: int) -> bytes:
+            file.seek(number * entry_size)
+            read_entries[number] = file.read(entry_size)
+            search_probes["count"] += 1
+            return read_entries[number][:64]
+
+        position = bounded_lower_bound(
+            read_key,
+            last_entry,
+            encoded_key,
+            predict_position(learned_app_id_model, int.from_bytes(encoded_key, "big")),
+            max_error,
+        )
+        if position < last_entry:
+            if position not in read_entries:
+                read_key(position)
+            entry = read_entries[position]
+            if entry[:64] == encoded_key:
+                return Record(entry, position), position
+        return None, position
 
-# Função que retorna uma lista de app_ids de aplicativos sem data de lançamento especificada.
-def entries_with_no_date() -> list[str]:
-    return binary_search_in_date_index(0)
 
+# Mesma coisa que a função lower_bound_in_date_index, mas usando o índice aprendido.
+def learned_lower_bound_in_date_index(target_key: int) -> int:
+    max_error = learned_date_model[0]
+    last_entry: int = os.path.getsize(date_index) // date_index_entry_size
 
-# Teste das funções.
-print("##################################")
-print("## Índice de data de lançamento ##")
-print("##################################")
+    with open(date_index, "rb") as file:
+
+        def read_key(number: int) -> int:
+            file.seek(number * date_index_entry_size)
+            search_probes["count"] += 1
+            return int.from_bytes(file.read(4), "little", signed=False)
+
+        return bounded_lower_bound(
+            read_key,
+            last_entry,
+            target_key,
+            predict_position(learned_date_model, target_key),
+            max_error,
+        )
+
+
+if is_main_process and use_learned_index:
+    if not os.path.exists(app_id_learned_index):
+        print("Criando índice aprendido de app ids...")
+
+        # Função pra alimentar os pares (app_id como número, posição) do arquivo binário.
+        def app_id_points() -> Iterable[Tuple[int, int]]:
+            with open(bin_data, "rb") as file:
+                number = 0
+                while True:
+                    block = file.read(entry_size * 4096)
+                    if not block:
+                        break
+                    for offset in range(0, len(block), entry_size):
+                        yield int.from_bytes(block[offset : offset + 64], "big"), number
+                        number += 1
+
+        write_learned_index(
+            app_id_learned_index,
+            fit_segments(app_id_points(), learned_max_error),
+            learned_max_error,
+            64,
+            "big",
+        )
+
+    if not os.path.exists(date_learned_index):
+        print("Criando índice aprendido de datas...")
+        write_learned_index(
+            date_learned_index,
+            fit_segments(
+                (
+                    (timestamp, position)
+                    for position, (timestamp, _) in enumerate(
+                        read_date_index_entries(date_index)
+                    )
+                ),
+                learned_max_error,
+            ),
+            learned_max_error,
+            4,
+            "little",
+        )
+
+    learned_app_id_model = load_learned_index(app_id_learned_index, 64, "big")
+    learned_date_model = load_learned_index(date_learned_index, 4, "little")
+
+    # Comparação entre a busca binária e o índice aprendido.
+    print("#######################")
+    print("## Índices aprendidos ##")
+    print("#######################")
+
+    print(
+        f"O índice de app ids tem {len(learned_app_id_model[1])} segmentos, e o de datas "
+        f"tem {len(learned_date_model[1])} (erro máximo de {learned_max_error} entradas)."
+    )
+
+    # Sorteia chaves que existem nos arquivos para usar nos testes (até 1000 de cada,
+    # para funcionar com arquivos menores).
+    sampler = random.Random(0)
+    with open(bin_data, "rb") as file:
+        sample_app_ids = []
+        last_entry = os.path.getsize(bin_data) // entry_size
+        for number in sampler.sample(range(last_entry), min(1000, last_entry)):
+            file.seek(number * entry_size)
+            sample_app_ids.append(file.read(64).decode("ascii").strip())
+    with open(date_index, "rb") as file:
+        sample_dates = []
+        last_entry = os.path.getsize(date_index) // date_index_entry_size
+        for number in sampler.sample(range(last_entry), min(1000, last_entry)):
+            file.seek(number * date_index_entry_size)
+            sample_dates.append(int.from_bytes(file.read(4), "little", signed=False))
+
+    # Roda a busca para todas as chaves, e mostra a média de leituras e de tempo.
+    def benchmark(name: str, search: Callable[[object], object], keys: list) -> list:
+        search_probes["count"] = 0
+        start = time.perf_counter()
+        results = [search(key) for key in keys]
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name}: {search_probes['count'] / max(len(keys), 1):.1f} leituras e "
+            f"{elapsed / max(len(keys), 1) * 1000000:.1f} µs por busca."
+        )
+        return results
+
+    binary_results = benchmark(
+        "App id, busca binária",
+        lambda key: binary_search_in_datafile(key, *binary_search_in_appid_index(key))[
+            0
+        ],
+        sample_app_ids,
+    )
+    learned_results = benchmark(
+        "App id, índice aprendido",
+        lambda key: learned_search_in_datafile(key)[0],
+        sample_app_ids,
+    )
+    print(
+        f"Encontrados: {sum(1 for result in binary_results if result)} com a busca "
+        f"binária e {sum(1 for result in learned_results if result)} com o índice aprendido."
+    )
+    binary_results = benchmark(
+        "Data, busca binária", lower_bound_in_date_index, sample_dates
+    )
+    learned_results = benchmark(
+        "Data, índice aprendido", learned_lower_bound_in_date_index, sample_dates
+    )
+    print(
+        "Mesmas posições nas buscas por data."
+        if binary_results == learned_results
+        else "Posições diferentes nas buscas por data!"
+    )
 
-# Quantos aplicativos foram lançados em 1/1/2020?
-print(
-    f"{len(entries_released_in_date(1, 1, 2020))} aplicativos foram lançados no dia 1 de janeiro de 2020."
-)
-# Quantos aplicativos não tem data de lançamento?
-print(
-    f"Há {len(entries_with_no_date())} aplicativos sem data de lançamento registrada."
-)
 
 ############################################
 ## Índice de desenvolvedores (em memória) ##
@@ -618,24 +1392,22 @@ def create_developer_index() -> Dict[str, List[str]]:
 
     # Passa pelo arquivo binário procurando por desenvolvedores novos,
     # ou aplicativos novos para adicionar ao índice.
-    with open(bin_data, "rb") as file:
-        while True:
-            entry = file.read(entry_size)
-            if not entry:
-                break
-            app_id, _, dev_name, _ = decode_entry(entry)
-            if dev_name not in developer_index:
-                developer_index[dev_name] = []
-            developer_index[dev_name].append(app_id)
+    # Só o app_id e o desenvolvedor de cada entrada são decodificados.
+    for record in scan_records():
+        dev_name = record.developer_id
+        if dev_name not in developer_index:
+            developer_index[dev_name] = []
+        developer_index[dev_name].append(record.app_id)
 
     return developer_index
 
 
-developer_index = create_developer_index()
+if is_main_process:
+    developer_index = create_developer_index()
 
 
 # Função que retorna uma lista de app_ids de aplicativos de um desenvolvedor.
-def apps_created_by(developer: str) -> list[Tuple[str, str, str, int]]:
+def apps_created_by(developer: str) -> List[Record]:
     if developer not in developer_index:
         return []
     result = []
@@ -644,20 +1416,54 @@ def apps_created_by(developer: str) -> list[Tuple[str, str, str, int]]:
     return result
 
 
+# Versões paginadas. O cursor é a posição na lista de app_ids do desenvolvedor.
+def app_id_positions(
+    app_ids: List[str], cursor: Optional[int] = None
+) -> Iterable[Tuple[int, str]]:
+    if cursor is None:
+        cursor = 0
+    check_cursor(cursor, len(app_ids))
+    for position in range(cursor, len(app_ids)):
+        yield position, app_ids[position]
+
+
+# Busca as entradas de uma página de app_ids.
+def get_entries_by_app_ids(app_ids: List[str]) -> List[Record]:
+    return [get_entry_by_app_id(app_id) for app_id in app_ids]
+
+
+def iter_apps_created_by(
+    developer: str, cursor: Optional[int] = None
+) -> Iterable[Tuple[int, Record]]:
+    for position, app_id in app_id_positions(developer_index.get(developer, []), cursor):
+        yield position, get_entry_by_app_id(app_id)
+
+
+def page_apps_created_by(
+    developer: str, cursor: Optional[int] = None, page_size: int = 100
+) -> Tuple[List[Record], Optional[int]]:
+    return paginate(
+        app_id_positions(developer_index.get(developer, []), cursor),
+        get_entries_by_app_ids,
+        page_size,
+    )
+
+
 # Teste da função.
-print("###############################")
-print("## Índice de desenvolvedores ##")
-print("###############################")
-
-# Quantos e quais aplicativos foram desenvolvidos pela empresa Mojang?
-target_dev = "mojang"
-print(f"Procurando aplicativos desenvolvidos por {target_dev}.")
-apps_created = apps_created_by(target_dev)
-print(
-    f"O desenvolvedor {target_dev} já publicou {len(apps_created)} aplicativos. Sendo esses:"
-)
-for app in apps_created:
-    print(f"- {app[0]}")
+if is_main_process:
+    print("###############################")
+    print("## Índice de desenvolvedores ##")
+    print("###############################")
+
+    # Quantos e quais aplicativos foram desenvolvidos pela empresa Mojang?
+    target_dev = "mojang"
+    print(f"Procurando aplicativos desenvolvidos por {target_dev}.")
+    apps_created = apps_created_by(target_dev)
+    print(
+        f"O desenvolvedor {target_dev} já publicou {len(apps_created)} aplicativos. Sendo esses:"
+    )
+    for app in apps_created:
+        print(f"- {app[0]}")
 
 
 #######################################################
@@ -823,43 +1629,1028 @@ class AVLTree(object):
             self.printHelper(currPtr.right, indent, True)
 
 
-print("Criando índice de categorias...")
+if is_main_process:
+    print("Criando índice de categorias...")
 
-# Primeiro eu crio um dicionário, assim como o índice de desenvolvedores, para
-# depois inserir na árvore.
-category_index: Dict[str, List[str]] = {}
+    # Primeiro eu crio um dicionário, assim como o índice de desenvolvedores, para
+    # depois inserir na árvore.
+    category_index: Dict[str, List[str]] = {}
 
-with open(bin_data, "rb") as file:
-    while True:
-        entry = file.read(entry_size)
-        if not entry:
-            break
-        app_id, category, _, _ = decode_entry(entry)
+    for record in scan_records():
+        category = record.category
         if category not in category_index:
             category_index[category] = []
-        category_index[category].append(app_id)
+        category_index[category].append(record.app_id)
 
-category_tree = AVLTree()
-root = None
-for category, app_ids in category_index.items():
-    root = category_tree.insert(root, category, app_ids)
+    category_tree = AVLTree()
+    root = None
+    for category, app_ids in category_index.items():
+        root = category_tree.insert(root, category, app_ids)
 
-print("#######################################################")
-print("## Índice de aplicativos com árvore AVL (em memória) ##")
-print("#######################################################")
+    print("#######################################################")
+    print("## Índice de aplicativos com árvore AVL (em memória) ##")
+    print("#######################################################")
 
-print("Visualização da árvore:")
-category_tree.printHelper(root, "", True)
+    print("Visualização da árvore:")
+    category_tree.printHelper(root, "", True)
 
-target_category = "food & drink"
-print(f"Pesquisando aplicativos na categoria {target_category}:")
-social = category_tree.search(root, target_category)
-print(
-    f"Existem {len(social.contents)} aplicativos na categoria {target_category}. Por exemplo:"
-)
-for i in range(5):
-    print(f"- {social.contents[i]}")
+    target_category = "food & drink"
+    print(f"Pesquisando aplicativos na categoria {target_category}:")
+    social = category_tree.search(root, target_category)
+    print(
+        f"Existem {len(social.contents)} aplicativos na categoria {target_category}. Por exemplo:"
+    )
+    for i in range(5):
+        print(f"- {social.contents[i]}")
+
+
+# Versões paginadas da busca por categoria. O cursor é a posição na lista de app_ids
+# da categoria.
+def category_app_ids(category: str) -> List[str]:
+    node = category_tree.search(root, category)
+    return [] if node is None else node.contents
+
+
+def iter_apps_in_category(
+    category: str, cursor: Optional[int] = None
+) -> Iterable[Tuple[int, Record]]:
+    for position, app_id in app_id_positions(category_app_ids(category), cursor):
+        yield position, get_entry_by_app_id(app_id)
+
+
+def page_apps_in_category(
+    category: str, cursor: Optional[int] = None, page_size: int = 100
+) -> Tuple[List[Record], Optional[int]]:
+    return paginate(
+        app_id_positions(category_app_ids(category), cursor),
+        get_entries_by_app_ids,
+        page_size,
+    )
+
+
+# Pega duas páginas de aplicativos da categoria, continuando a partir do cursor.
+if is_main_process:
+    page, cursor = page_apps_in_category(target_category, page_size=3)
+    print(
+        f"Primeira página de {target_category}: {', '.join(app.app_id for app in page)}"
+    )
+    page, cursor = page_apps_in_category(target_category, cursor, page_size=3)
+    print(
+        f"Segunda página de {target_category}: {', '.join(app.app_id for app in page)}"
+    )
+
+
+###########################################
+## Aplicativos mais novos e mais antigos ##
+###########################################
+
+# Para pegar, por exemplo, os 20 aplicativos mais novos de uma categoria, seria preciso
+# buscar todos os aplicativos da categoria e ordenar pela data. Em vez disso, esses
+# índices guardam os aplicativos de cada desenvolvedor e de cada categoria já ordenados
+# pela data de lançamento, com o seguinte formato:
+# Chave (desenvolvedor ou categoria, 64 bytes ASCII) +
+# Data de lançamento (unix timestamp, uint32 little endian, 4 bytes) +
+# Número da entrada no arquivo binário (uint32 little endian, 4 bytes)
+# Então, cada item nesses índices tem 72 bytes.
+# Com duas buscas binárias dá pra achar onde começam e terminam as entradas com data
+# de uma chave, e aí só os k itens de uma das pontas são lidos. Os aplicativos sem data
+# de lançamento ficam de fora.
+
+
+# Converte uma tupla (chave, data, número da entrada) para o formato do índice.
+def encode_key_date_index_entry(key: bytes, timestamp: int, number: int) -> bytes:
+    return (
+        key
+        + timestamp.to_bytes(4, "little", signed=False)
+        + number.to_bytes(4, "little", signed=False)
+    )
+
+
+# Função pra ler as tuplas (chave, data, número da entrada) de um arquivo nesse formato.
+def read_key_date_index_entries(file_name: str) -> Iterable[Tuple[bytes, int, int]]:
+    with open(file_name, "rb") as file:
+        while True:
+            block = file.read(key_date_index_entry_size * 4096)
+            if not block:
+                break
+            for offset in range(0, len(block), key_date_index_entry_size):
+                yield (
+                    block[offset : offset + 64],
+                    int.from_bytes(
+                        block[offset + 64 : offset + 68], "little", signed=False
+                    ),
+                    int.from_bytes(
+                        block[offset + 68 : offset + 72], "little", signed=False
+                    ),
+                )
+
+
+# Cria o índice sobre o campo que começa em field_offset (desenvolvedor ou categoria)
+# e a data de lançamento.
+def build_key_date_index(data_file: str, output_file: str, field_offset: int) -> None:
+    external_sort(
+        (
+            (
+                bytes(record.buffer[field_offset : field_offset + 64]),
+                record.release_timestamp,
+                record.number,
+            )
+            for record in scan_records(file_name=data_file)
+        ),
+        output_file,
+        encode_key_date_index_entry,
+        read_key_date_index_entries,
+        data_file,
+    )
+
+
+if is_main_process and not os.path.exists(developer_date_index):
+    print("Criando índice de desenvolvedores por data...")
+    build_key_date_index(bin_data, developer_date_index, 128)
+
+if is_main_process and not os.path.exists(category_date_index):
+    print("Criando índice de categorias por data...")
+    build_key_date_index(bin_data, category_date_index, 64)
+
+
+# Busca binária que retorna a posição do primeiro item do índice com (chave, data) maior
+# ou igual a (key, timestamp).
+def lower_bound_in_key_date_index(file_name: str, key: bytes, timestamp: int) -> int:
+    last_entry: int = os.path.getsize(file_name) // key_date_index_entry_size
+    with open(file_name, "rb") as file:
+        lower_bound: int = 0
+        upper_bound: int = last_entry
+        while lower_bound < upper_bound:
+            midpoint: int = (lower_bound + upper_bound) // 2
+            file.seek(midpoint * key_date_index_entry_size)
+            entry = file.read(68)
+            search_probes["count"] += 1
+            entry_key = (entry[:64], int.from_bytes(entry[64:68], "little", signed=False))
+            if entry_key < (key, timestamp):
+                lower_bound = midpoint + 1
+            else:
+                upper_bound = midpoint
+        return lower_bound
+
+
+# Retorna os números das k entradas mais novas (ou mais antigas) com a chave dada.
+def top_k_in_key_date_index(
+    file_name: str, key: str, k: int, newest: bool
+) -> List[int]:
+    encoded_key = key.lower().encode("ascii").ljust(64, b" ")[:64]
+    # Primeira entrada da chave com data, e primeira entrada depois da chave.
+    first = lower_bound_in_key_date_index(file_name, encoded_key, 1)
+    last = lower_bound_in_key_date_index(file_name, encoded_key, 2**32)
+    count = max(min(k, last - first), 0)
+    if count == 0:
+        return []
+
+    with open(file_name, "rb") as file:
+        file.seek((last - count if newest else first) * key_date_index_entry_size)
+        block = file.read(count * key_date_index_entry_size)
+    numbers = [
+        int.from_bytes(block[offset + 68 : offset + 72], "little", signed=False)
+        for offset in range(0, len(block), key_date_index_entry_size)
+    ]
+    return numbers[::-1] if newest else numbers
+
+
+# Escolhe o índice de acordo com o filtro dado (só um dos dois).
+def key_date_index_for(
+    category: Optional[str], developer: Optional[str]
+) -> Tuple[str, str]:
+    if (category is None) == (developer is None):
+        raise ValueError("Informe uma categoria ou um desenvolvedor.")
+    if category is not None:
+        return category_date_index, category
+    return developer_date_index, developer
+
+
+# Retorna os k aplicativos mais novos de uma categoria ou de um desenvolvedor, do mais
+# novo para o mais antigo.
+def newest_apps(
+    category: Optional[str] = None, developer: Optional[str] = None, k: int = 10
+) -> List[Record]:
+    file_name, key = key_date_index_for(category, developer)
+    return get_entries_by_numbers(top_k_in_key_date_index(file_name, key, k, True))
+
+
+# Retorna os k aplicativos mais antigos de uma categoria ou de um desenvolvedor, do mais
+# antigo para o mais novo.
+def oldest_apps(
+    category: Optional[str] = None, developer: Optional[str] = None, k: int = 10
+) -> List[Record]:
+    file_name, key = key_date_index_for(category, developer)
+    return get_entries_by_numbers(top_k_in_key_date_index(file_name, key, k, False))
+
+
+# Teste das funções.
+if is_main_process:
+    print("###########################################")
+    print("## Aplicativos mais novos e mais antigos ##")
+    print("###########################################")
+
+    print(f"Os 5 aplicativos mais novos em {target_category}:")
+    for app in newest_apps(category=target_category, k=5):
+        print(f"- {app.app_id} ({app.release_date})")
+    print(f"Os 3 aplicativos mais antigos de {target_dev}:")
+    for app in oldest_apps(developer=target_dev, k=3):
+        print(f"- {app.app_id} ({app.release_date})")
+
+
+#######################################
+## Varredura paralela com predicados ##
+#######################################
+
+# Para consultas que nenhum índice cobre (por exemplo, desenvolvedor contém "studio" e
+# categoria é games ou puzzle), o jeito é passar pelo arquivo binário inteiro. Aqui o
+# arquivo é dividido em faixas de entradas, e cada faixa é testada por um processo
+# diferente. Os predicados são testados direto nos bytes das entradas, sem decodificar
+# nada, e os números das entradas que passam são devolvidos na ordem do arquivo, então o
+# resultado é exatamente o mesmo de uma varredura sequencial.
+# Cada predicado é uma tupla (campo, operação, valor), e todos precisam ser verdadeiros:
+# ("category", "eq", "games")                    campo igual ao valor
+# ("category", "in", ["games", "puzzle"])        campo igual a algum dos valores
+# ("app_id", "prefix", "com.")                   campo começa com o valor
+# ("developer_id", "contains", "studio")         campo contém o valor
+# ("release_date", "between", (inicio, fim))     data (timestamp) entre inicio e fim, inclusive
+# Os processos são criados com spawn, então a varredura também é paralela no Windows.
+
+# Posição de cada campo nas entradas do arquivo binário.
+field_offsets: Dict[str, int] = {
+    "app_id": 0,
+    "category": 64,
+    "developer_id": 128,
+    "release_date": 192,
+}
+
+
+# Converte os predicados para o formato das entradas: posição do campo, operação e
+# valor em bytes (em minúsculas e ASCII, igual aos dados).
+def compile_predicates(
+    predicates: Iterable[Tuple[str, str, object]],
+) -> List[Tuple[int, str, object]]:
+    compiled = []
+    for field, operation, value in predicates:
+        offset = field_offsets[field]
+        if field == "release_date":
+            if operation != "between":
+                raise ValueError(f"Operação {operation} não suportada para datas.")
+            compiled.append((offset, operation, (int(value[0]), int(value[1]))))
+            continue
+        if operation == "eq":
+            value = (value,)
+            operation = "in"
+        if operation == "in":
+            encoded = tuple(
+                item.lower().encode("ascii").ljust(64, b" ")[:64] for item in value
+            )
+        elif operation in ("prefix", "contains"):
+            # Sem espaços nas pontas, para o valor nunca "passar" para os espaços que
+            # completam o campo.
+            encoded = value.lower().strip().encode("ascii")[:64]
+        else:
+            raise ValueError(f"Operação {operation} não suportada.")
+        compiled.append((offset, operation, encoded))
+    return compiled
+
+
+# Testa os predicados nas entradas de first até last (sem incluir last), e retorna os
+# números das entradas que passam em todos. É o que cada processo roda.
+def scan_range(
+    compiled: List[Tuple[int, str, object]], first: int, last: int
+) -> List[int]:
+    result: List[int] = []
+    block_entries = 4096
+    with open(bin_data, "rb") as file:
+        file.seek(first * entry_size)
+        number = first
+        while number < last:
+            block = file.read(entry_size * min(block_entries, last - number))
+            if not block:
+                break
+            for start in range(0, len(block), entry_size):
+                for offset, operation, value in compiled:
+                    position = start + offset
+                    if operation == "in" or operation == "prefix":
+                        # startswith aceita uma tupla, e não copia os bytes do campo.
+                        if not block.startswith(value, position):
+                            break
+                    elif operation == "contains":
+                        if block.find(value, position, position + 64) == -1:
+                            break
+                    else:
+                        timestamp = struct.unpack_from("<I", block, position)[0]
+                        if not value[0] <= timestamp <= value[1]:
+                            break
+                else:
+                    result.append(number)
+                number += 1
+    return result
+
+
+# Varredura sequencial, usada quando não dá para criar processos, e para comparação.
+def serial_scan(predicates: Iterable[Tuple[str, str, object]]) -> List[int]:
+    return scan_range(
+        compile_predicates(predicates), 0, os.path.getsize(bin_data) // entry_size
+    )
+
+
+# Cria um grupo de até workers processos. Os processos são criados com spawn, que
+# funciona em todos os sistemas (inclusive no Windows, onde não tem fork). Cada processo
+# importa este arquivo de novo para achar as funções, mas como ele não é o processo
+# principal, só as funções e constantes são definidas (veja is_main_process).
+def create_process_pool(
+    workers: int, initializer: Optional[Callable[[], None]] = None
+) -> concurrent.futures.ProcessPoolExecutor:
+    return concurrent.futures.ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+    )
+
+
+# Roda uma tarefa dentro de um processo. Qualquer erro (até SystemExit) é devolvido
+# como um RuntimeError com o texto do erro, porque o próprio erro pode não dar para
+# mandar de volta para o processo principal.
+def run_task(function: Callable[..., object], *args) -> object:
+    try:
+        return function(*args)
+    except BaseException:
+        raise RuntimeError(f"Erro no processo:\n{traceback.format_exc()}") from None
+
+
+# Roda function(*argumentos) para cada tarefa, distribuindo as tarefas entre até workers
+# processos, e devolve os resultados na ordem das tarefas, assim que cada um fica pronto
+# (e os anteriores também). Se um processo der erro, o erro é levantado aqui, e se um
+# processo morrer (falta de memória, por exemplo), o ProcessPoolExecutor levanta
+# BrokenProcessPool em vez de ficar esperando. Com um processador só (ou uma tarefa
+# só), não vale a pena criar processos, e roda tudo aqui mesmo.
+def run_in_processes(
+    function: Callable[..., object],
+    tasks: List[Tuple],
+    workers: Optional[int] = None,
+) -> Iterable[object]:
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            yield function(*task)
+        return
+
+    executor = create_process_pool(workers)
+    try:
+        futures = [executor.submit(run_task, function, *task) for task in tasks]
+        for future in futures:
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Varredura paralela. Divide o arquivo em faixas de rows_per_task entradas, distribuídas
+# entre os processos, e devolve os números das entradas encontradas em ordem, faixa por
+# faixa, assim que cada faixa fica pronta (e as faixas anteriores também).
+def parallel_scan(
+    predicates: Iterable[Tuple[str, str, object]],
+    workers: Optional[int] = None,
+    rows_per_task: int = 65536,
+) -> Iterable[int]:
+    compiled = compile_predicates(predicates)
+    last_entry = os.path.getsize(bin_data) // entry_size
+    tasks = [
+        (compiled, first, min(first + rows_per_task, last_entry))
+        for first in range(0, last_entry, rows_per_task)
+    ]
+    for numbers in run_in_processes(scan_range, tasks, workers):
+        yield from numbers
+
+
+# Teste da varredura.
+if is_main_process:
+    print("#######################################")
+    print("## Varredura paralela com predicados ##")
+    print("#######################################")
+
+    scan_predicates = [
+        ("developer_id", "contains", "studio"),
+        ("category", "in", ["games", "puzzle"]),
+    ]
+    print(
+        "Procurando aplicativos de desenvolvedores com 'studio' no nome, em games ou puzzle."
+    )
+    start_time = time.perf_counter()
+    serial_result = serial_scan(scan_predicates)
+    serial_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    parallel_result = list(parallel_scan(scan_predicates))
+    parallel_time = time.perf_counter() - start_time
+    print(
+        f"Encontrados {len(parallel_result)} aplicativos "
+        f"(sequencial: {serial_time:.2f} s, paralela: {parallel_time:.2f} s)."
+    )
+    print(
+        "Os resultados são iguais aos da varredura sequencial."
+        if serial_result == parallel_result
+        else "Os resultados são diferentes da varredura sequencial!"
+    )
+    for number in parallel_result[:5]:
+        app = get_entry_by_number(number)
+        print(f"- {app.app_id} ({app.developer_id}, {app.category})")
+
+
+##############################
+## Exportação de resultados ##
+##############################
+
+# Exporta muitos resultados de uma vez (uma categoria inteira, um intervalo de datas,
+# todos os aplicativos sem data, ou o resultado de uma varredura) direto do arquivo
+# binário, sem passar por get_entry_by_app_id para cada um.
+# As entradas são lidas em blocos: números consecutivos são lidos com uma leitura só.
+# As escritas usam buffers grandes, e as datas são escritas como unix timestamp, sem
+# criar um datetime para cada entrada, a não ser que dates=True. Nesse caso, cada data
+# diferente é formatada uma vez só.
+# Formatos:
+# - csv: uma linha de cabeçalho e uma linha por aplicativo;
+# - jsonl: um objeto JSON por linha;
+# - columnar: um arquivo por campo. Os campos de texto têm um arquivo .dat com os
+#   valores emendados e um .offsets com as posições (uint32 little endian) em que cada
+#   valor começa, mais uma posição final. A data é um .dat com um uint32 little endian
+#   por aplicativo.
+
+export_fields: List[str] = ["app_id", "category", "developer_id", "release_date"]
+
+
+# Números das entradas de uma chave num índice de (chave, data), em ordem de número
+# (ou seja, de app_id). Inclui os aplicativos sem data.
+def rows_in_key_date_index(file_name: str, key: str) -> List[int]:
+    encoded_key = key.lower().encode("ascii").ljust(64, b" ")[:64]
+    first = lower_bound_in_key_date_index(file_name, encoded_key, 0)
+    last = lower_bound_in_key_date_index(file_name, encoded_key, 2**32)
+    with open(file_name, "rb") as file:
+        file.seek(first * key_date_index_entry_size)
+        block = file.read((last - first) * key_date_index_entry_size)
+    return sorted(
+        int.from_bytes(block[offset + 68 : offset + 72], "little", signed=False)
+        for offset in range(0, len(block), key_date_index_entry_size)
+    )
+
+
+def rows_in_category(category: str) -> List[int]:
+    return rows_in_key_date_index(category_date_index, category)
+
+
+def rows_by_developer(developer: str) -> List[int]:
+    return rows_in_key_date_index(developer_date_index, developer)
+
+
+# Números das entradas lançadas entre as duas datas (unix timestamp, inclusive), em
+# ordem de data.
+def rows_released_between(first_timestamp: int, last_timestamp: int) -> Iterable[int]:
+    first = find_first_in_date_index(first_timestamp)
+    last = find_first_in_date_index(last_timestamp + 1)
+    with open(date_index, "rb") as file:
+        file.seek(first * date_index_entry_size)
+        remaining = last - first
+        while remaining > 0:
+            block = file.read(date_index_entry_size * min(remaining, 4096))
+            if not block:
+                break
+            for offset in range(0, len(block), date_index_entry_size):
+                yield int.from_bytes(
+                    block[offset + 4 : offset + 8], "little", signed=False
+                )
+            remaining -= len(block) // date_index_entry_size
+
+
+def rows_with_no_date() -> Iterable[int]:
+    return rows_released_between(0, 0)
+
+
+# Lê as entradas com os números dados, na ordem dada. Números consecutivos são lidos
+# juntos, em blocos de até block_entries entradas.
+def iter_records(numbers: Iterable[int], block_entries: int = 4096) -> Iterable[Record]:
+    with open(bin_data, "rb") as file:
+
+        def read_run(first: int, count: int) -> Iterable[Record]:
+            file.seek(first * entry_size)
+            view = memoryview(file.read(count * entry_size))
+            for offset in range(0, len(view) - entry_size + 1, entry_size):
+                yield Record(view[offset : offset + entry_size], first)
+                first += 1
+
+        first, count = -1, 0
+        for number in numbers:
+            if count and (number != first + count or count == block_entries):
+                yield from read_run(first, count)
+                count = 0
+            if count == 0:
+                first = number
+            count += 1
+        if count:
+            yield from read_run(first, count)
+
+
+# Formata uma data para exportação. Cada data diferente só é formatada uma vez.
+@functools.lru_cache(maxsize=None)
+def format_export_date(timestamp: int) -> Optional[str]:
+    if timestamp == 0:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp).date().isoformat()
+
+
+def write_csv(records: Iterable[Record], output_file: str, dates: bool = False) -> int:
+    count = 0
+    with open(
+        output_file, "w", encoding="ascii", newline="", buffering=1 << 20
+    ) as output:
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(export_fields)
+        for record in records:
+            timestamp = record.release_timestamp
+            writer.writerow(
+                (
+                    record.app_id,
+                    record.category,
+                    record.developer_id,
+                    (format_export_date(timestamp) or "") if dates else timestamp,
+                )
+            )
+            count += 1
+    return count
+
+
+def write_jsonl(
+    records: Iterable[Record], output_file: str, dates: bool = False
+) -> int:
+    count = 0
+    with open(output_file, "w", encoding="ascii", buffering=1 << 20) as output:
+        lines: List[str] = []
+        for record in records:
+            timestamp = record.release_timestamp
+            lines.append(
+                json.dumps(
+                    {
+                        "app_id": record.app_id,
+                        "category": record.category,
+                        "developer_id": record.developer_id,
+                        "release_date": (
+                            format_export_date(timestamp) if dates else timestamp
+                        ),
+                    }
+                )
+            )
+            count += 1
+            if len(lines) == 4096:
+                lines.append("")
+                output.write("\n".join(lines))
+                lines = []
+        if lines:
+            lines.append("")
+            output.write("\n".join(lines))
+    return count
+
+
+# Escreve os arquivos do formato colunar, com nomes output_prefix.campo.dat e
+# output_prefix.campo.offsets. Os campos de texto são copiados direto dos bytes das
+# entradas, sem decodificar.
+def write_columnar(records: Iterable[Record], output_prefix: str) -> int:
+    count = 0
+    text_fields = [("app_id", 0), ("category", 64), ("developer_id", 128)]
+    files = {}
+    try:
+        for field, _ in text_fields:
+            files[field] = open(f"{output_prefix}.{field}.dat", "wb", buffering=1 << 20)
+            files[field + ".offsets"] = open(
+                f"{output_prefix}.{field}.offsets", "wb", buffering=1 << 20
+            )
+            files[field + ".offsets"].write((0).to_bytes(4, "little", signed=False))
+        files["release_date"] = open(
+            f"{output_prefix}.release_date.dat", "wb", buffering=1 << 20
+        )
+
+        positions = {field: 0 for field, _ in text_fields}
+        values = {field: bytearray() for field, _ in text_fields}
+        offsets = {field: bytearray() for field, _ in text_fields}
+        release_dates = bytearray()
+
+        def flush() -> None:
+            for field, _ in text_fields:
+                files[field].write(values[field])
+                files[field + ".offsets"].write(offsets[field])
+                values[field].clear()
+                offsets[field].clear()
+            files["release_date"].write(release_dates)
+            release_dates.clear()
+
+        for record in records:
+            for field, field_offset in text_fields:
+                value = bytes(record.buffer[field_offset : field_offset + 64]).strip()
+                values[field] += value
+                positions[field] += len(value)
+                offsets[field] += positions[field].to_bytes(4, "little", signed=False)
+            release_dates += record.buffer[192:196]
+            count += 1
+            if count % 4096 == 0:
+                flush()
+        flush()
+    finally:
+        for file in files.values():
+            file.close()
+    return count
+
+
+# Exporta as entradas com os números dados no formato escolhido. Para o formato colunar,
+# output é o prefixo dos nomes dos arquivos. Retorna a quantidade de entradas exportadas.
+def export(
+    numbers: Iterable[int], output: str, format: str = "csv", dates: bool = False
+) -> int:
+    records = iter_records(numbers)
+    if format == "csv":
+        return write_csv(records, output, dates)
+    if format == "jsonl":
+        return write_jsonl(records, output, dates)
+    if format == "columnar":
+        return write_columnar(records, output)
+    raise ValueError(f"Formato {format} não suportado.")
+
+
+# Teste da exportação.
+if is_main_process:
+    print("##############################")
+    print("## Exportação de resultados ##")
+    print("##############################")
+
+    os.makedirs(export_dir, exist_ok=True)
+    export_name = target_category.replace(" & ", "_")
+    for export_format, extension in [
+        ("csv", ".csv"),
+        ("jsonl", ".jsonl"),
+        ("columnar", ""),
+    ]:
+        start_time = time.perf_counter()
+        exported = export(
+            rows_in_category(target_category),
+            os.path.join(export_dir, export_name + extension),
+            export_format,
+        )
+        print(
+            f"Exportados {exported} aplicativos de {target_category} em {export_format} "
+            f"({time.perf_counter() - start_time:.2f} s)."
+        )
+    exported = export(
+        rows_with_no_date(), os.path.join(export_dir, "no_date.csv"), "csv", dates=True
+    )
+    print(f"Exportados {exported} aplicativos sem data em csv.")
+
+
+###############################
+## Layout dividido em partes ##
+###############################
+
+# Modo opcional em que o arquivo binário é dividido em shard_count partes, cada uma
+# com uma faixa contínua de app_ids. Cada parte fica numa pasta própria, com o seu
+# arquivo binário e os seus índices:
+# - índice de datas (mesmo formato do principal, com os números das entradas da parte);
+# - índices de desenvolvedores e de categorias em arquivo, ordenados por (chave, número),
+#   com o seguinte formato:
+#   Chave (desenvolvedor ou categoria, 64 bytes ASCII) +
+#   Número da entrada na parte (uint32 little endian, 4 bytes)
+#   Então, cada item nesses índices tem 68 bytes.
+# As partes são criadas em paralelo, uma por processo. No fim é escrita a tabela de
+# roteamento, e como ela é escrita por último, a existência dela indica que todas as
+# partes estão completas. Formato de cada item da tabela:
+# Primeiro app_id da parte (64 bytes ASCII) +
+# Número da primeira entrada da parte no arquivo principal (uint32 little endian, 4 bytes) +
+# Quantidade de entradas na parte (uint32 little endian, 4 bytes)
+# Consultas por app_id vão direto para a parte certa. Consultas por desenvolvedor,
+# categoria e data são feitas em todas as partes em paralelo, por processos que ficam
+# esperando consultas, e os resultados são combinados em ordem de app_id. Os números das
+# entradas devolvidas são sempre os do arquivo principal (número da primeira entrada da
+# parte + número na parte).
+
+
+# Caminho de um arquivo dentro da pasta de uma parte.
+def shard_file(shard: int, file_name: str) -> str:
+    return os.path.join(shard_dir, f"shard_{shard}", file_name)
+
+
+# Converte um par (chave, número da entrada) para o formato dos índices em arquivo.
+def encode_key_index_entry(key: bytes, number: int) -> bytes:
+    return key + number.to_bytes(4, "little", signed=False)
+
+
+# Função pra ler os pares (chave, número da entrada) de um índice em arquivo.
+def read_key_index_entries(file_name: str) -> Iterable[Tuple[bytes, int]]:
+    with open(file_name, "rb") as file:
+        while True:
+            block = file.read(key_index_entry_size * 4096)
+            if not block:
+                break
+            for offset in range(0, len(block), key_index_entry_size):
+                yield (
+                    block[offset : offset + 64],
+                    int.from_bytes(
+                        block[offset + 64 : offset + 68], "little", signed=False
+                    ),
+                )
+
+
+# Cria um índice em arquivo sobre o campo que começa em field_offset (desenvolvedor
+# ou categoria) de um arquivo binário.
+def build_key_index(data_file: str, output_file: str, field_offset: int) -> None:
+    external_sort(
+        (
+            (bytes(record.buffer[field_offset : field_offset + 64]), record.number)
+            for record in scan_records(file_name=data_file)
+        ),
+        output_file,
+        encode_key_index_entry,
+        read_key_index_entries,
+        data_file,
+    )
+
+
+# Retorna os números das entradas com a chave dada num índice em arquivo. Faz uma busca
+# binária pela primeira entrada com essa chave, e lê para frente a partir dela.
+def search_in_key_index(file_name: str, key: str) -> List[int]:
+    encoded_key = key.lower().encode("ascii").ljust(64, b" ")[:64]
+    last_entry: int = os.path.getsize(file_name) // key_index_entry_size
+    result = []
+    with open(file_name, "rb") as file:
+        lower_bound: int = 0
+        upper_bound: int = last_entry
+        while lower_bound < upper_bound:
+            midpoint: int = (lower_bound + upper_bound) // 2
+            file.seek(midpoint * key_index_entry_size)
+            search_probes["count"] += 1
+            if file.read(64) < encoded_key:
+                lower_bound = midpoint + 1
+            else:
+                upper_bound = midpoint
+
+        file.seek(lower_bound * key_index_entry_size)
+        while True:
+            entry = file.read(key_index_entry_size)
+            if not entry or entry[:64] != encoded_key:
+                break
+            result.append(int.from_bytes(entry[64:68], "little", signed=False))
+    return result
+
+
+# Cria uma parte com as entradas de first até last (sem incluir last) do arquivo
+# principal. É o que cada processo roda.
+# Os arquivos que já existirem (de uma execução interrompida) não são criados de novo.
+def build_shard(shard: int, first: int, last: int) -> int:
+    os.makedirs(os.path.dirname(shard_file(shard, bin_data)), exist_ok=True)
+
+    # Copia as entradas da parte em blocos grandes.
+    if not os.path.exists(shard_file(shard, bin_data)):
+        with open(bin_data, "rb") as file, atomic_output(
+            shard_file(shard, bin_data)
+        ) as output:
+            file.seek(first * entry_size)
+            remaining = last - first
+            while remaining > 0:
+                block = file.read(entry_size * min(remaining, 4096))
+                if not block:
+                    break
+                output.write(block)
+                remaining -= len(block) // entry_size
+
+    if not os.path.exists(shard_file(shard, date_index)):
+        build_date_index(shard_file(shard, bin_data), shard_file(shard, date_index))
+    if not os.path.exists(shard_file(shard, developer_index_file)):
+        build_key_index(
+            shard_file(shard, bin_data), shard_file(shard, developer_index_file), 128
+        )
+    if not os.path.exists(shard_file(shard, category_index_file)):
+        build_key_index(
+            shard_file(shard, bin_data), shard_file(shard, category_index_file), 64
+        )
+    return shard
+
+
+# Tabela de roteamento carregada na memória: primeiro app_id, número da primeira entrada
+# e quantidade de entradas de cada parte.
+shard_first_keys: List[bytes] = []
+shard_first_numbers: List[int] = []
+shard_sizes: List[int] = []
+
+
+def read_routing_table() -> None:
+    shard_first_keys.clear()
+    shard_first_numbers.clear()
+    shard_sizes.clear()
+    with open(shard_routing_table, "rb") as file:
+        while True:
+            entry = file.read(72)
+            if not entry:
+                break
+            shard_first_keys.append(entry[:64])
+            shard_first_numbers.append(
+                int.from_bytes(entry[64:68], "little", signed=False)
+            )
+            shard_sizes.append(int.from_bytes(entry[68:72], "little", signed=False))
+
+
+# Carrega a tabela de roteamento, e cria os processos que fazem as consultas nas partes.
+def load_routing_table() -> None:
+    read_routing_table()
+    start_shard_pool()
+
+
+# Retorna a parte que tem a faixa de app_ids em que o app_id dado estaria.
+def route_app_id(app_id: str) -> int:
+    encoded_key = app_id.lower().encode("ascii").ljust(64, b" ")[:64]
+    return max(bisect.bisect_right(shard_first_keys, encoded_key) - 1, 0)
+
+
+# Busca um aplicativo pelo app_id, só na parte certa.
+def sharded_get_entry_by_app_id(app_id: str) -> Optional[Record]:
+    shard = route_app_id(app_id)
+    result, position = binary_search_in_datafile(
+        app_id, file_name=shard_file(shard, bin_data)
+    )
+    if result:
+        result.number = shard_first_numbers[shard] + position
+    return result
+
+
+# Lê as entradas de uma parte, e devolve os números delas no arquivo principal, junto com
+# os bytes de cada uma (os Records não podem ser mandados entre processos, por causa
+# do memoryview).
+def read_shard_entries(shard: int, numbers: List[int]) -> List[Tuple[int, bytes]]:
+    result = []
+    with open(shard_file(shard, bin_data), "rb") as file:
+        for number in numbers:
+            file.seek(number * entry_size)
+            result.append((shard_first_numbers[shard] + number, file.read(entry_size)))
+    return result
+
+
+# Consultas feitas dentro de cada parte, por cada processo.
+def query_shard_key_index(
+    shard: int, index_file: str, key: str
+) -> List[Tuple[int, bytes]]:
+    return read_shard_entries(
+        shard, search_in_key_index(shard_file(shard, index_file), key)
+    )
+
+
+def query_shard_date(shard: int, timestamp: int) -> List[Tuple[int, bytes]]:
+    index_file = shard_file(shard, date_index)
+    numbers = []
+    with open(index_file, "rb") as file:
+        file.seek(
+            lower_bound_in_date_index(timestamp, index_file) * date_index_entry_size
+        )
+        while True:
+            entry = file.read(date_index_entry_size)
+            if (
+                not entry
+                or int.from_bytes(entry[0:4], "little", signed=False) != timestamp
+            ):
+                break
+            numbers.append(int.from_bytes(entry[4:8], "little", signed=False))
+    return read_shard_entries(shard, numbers)
+
+
+# Grupo de processos que fazem as consultas nas partes. É criado uma vez só, quando a
+# tabela de roteamento é carregada, e os processos ficam esperando consultas. Assim cada
+# consulta não precisa criar processos novos, o que demora bem mais do que as poucas
+# buscas binárias de cada parte. Cada processo carrega a tabela de roteamento ao
+# iniciar.
+shard_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def stop_shard_pool() -> None:
+    global shard_pool
+    if shard_pool is not None:
+        shard_pool.shutdown(wait=True, cancel_futures=True)
+        shard_pool = None
+
+
+# Cria o grupo de processos das partes. Assim como em run_in_processes, com um
+# processador só (ou uma parte só) as consultas são feitas aqui mesmo.
+def start_shard_pool() -> None:
+    global shard_pool
+    stop_shard_pool()
+    workers = min(len(shard_first_keys), os.cpu_count() or 1)
+    if workers > 1:
+        shard_pool = create_process_pool(workers, read_routing_table)
+
+
+# Faz a consulta em todas as partes em paralelo, e combina os resultados em ordem de
+# app_id. Cada parte já devolve os resultados em ordem de app_id.
+def fan_out(query: Callable[..., List[Tuple[int, bytes]]], *args) -> List[Record]:
+    shards = range(len(shard_first_keys))
+    if shard_pool is None:
+        results = [query(shard, *args) for shard in shards]
+    else:
+        try:
+            futures = [
+                shard_pool.submit(run_task, query, shard, *args) for shard in shards
+            ]
+            results = [future.result() for future in futures]
+        except concurrent.futures.process.BrokenProcessPool:
+            # Um processo morreu, e o grupo não aceita mais consultas. Cria outro para
+            # as próximas consultas.
+            start_shard_pool()
+            raise
+    return [
+        Record(entry, number)
+        for number, entry in heapq.merge(*results, key=lambda item: item[1][:64])
+    ]
+
+
+def sharded_apps_created_by(developer: str) -> List[Record]:
+    return fan_out(query_shard_key_index, developer_index_file, developer)
+
+
+def sharded_apps_in_category(category: str) -> List[Record]:
+    return fan_out(query_shard_key_index, category_index_file, category)
+
+
+def sharded_entries_released_in_date(day: int, month: int, year: int) -> List[Record]:
+    return fan_out(
+        query_shard_date, int(datetime.datetime(year, month, day).timestamp())
+    )
+
+
+def sharded_entries_with_no_date() -> List[Record]:
+    return fan_out(query_shard_date, 0)
+
+
+if is_main_process and use_shards:
+    if not os.path.exists(shard_routing_table):
+        print("Criando partes...")
+        last_entry = os.path.getsize(bin_data) // entry_size
+        parts = max(min(shard_count, last_entry), 1)
+        bounds = [
+            (shard, last_entry * shard // parts, last_entry * (shard + 1) // parts)
+            for shard in range(parts)
+        ]
+        for _ in run_in_processes(build_shard, bounds, parts):
+            pass
+
+        with atomic_output(shard_routing_table) as output, open(bin_data, "rb") as file:
+            for shard, first, last in bounds:
+                file.seek(first * entry_size)
+                output.write(
+                    file.read(64)
+                    + first.to_bytes(4, "little", signed=False)
+                    + (last - first).to_bytes(4, "little", signed=False)
+                )
+
+    load_routing_table()
+
+    # Teste das consultas nas partes, comparando com as consultas normais.
+    print("###############################")
+    print("## Layout dividido em partes ##")
+    print("###############################")
+
+    print(f"{len(shard_first_keys)} partes:")
+    for shard in range(len(shard_first_keys)):
+        print(
+            f"- Parte {shard}: {shard_sizes[shard]} aplicativos, a partir de "
+            f"{shard_first_keys[shard].decode('ascii').strip()}"
+        )
+
+    app_id = "com.roblox.client"
+    result = sharded_get_entry_by_app_id(app_id)
+    print(
+        f"{app_id} está na parte {route_app_id(app_id)}: "
+        f"{result.category if result else 'não encontrado'}"
+    )
+
+    def same_apps(sharded: List[Record], expected: List[Record]) -> str:
+        return (
+            "iguais"
+            if [app.number for app in sharded] == [app.number for app in expected]
+            else "diferentes!"
+        )
+
+    sharded_result = sharded_apps_created_by(target_dev)
+    print(
+        f"{len(sharded_result)} aplicativos de {target_dev}, resultados "
+        f"{same_apps(sharded_result, apps_created_by(target_dev))}"
+    )
+    sharded_result = sharded_apps_in_category(target_category)
+    print(
+        f"{len(sharded_result)} aplicativos em {target_category}, resultados "
+        f"{same_apps(sharded_result, [get_entry_by_app_id(app_id) for app_id in social.contents])}"
+    )
+    sharded_result = sharded_entries_released_in_date(1, 1, 2020)
+    print(
+        f"{len(sharded_result)} aplicativos lançados em 1/1/2020, resultados "
+        f"{same_apps(sharded_result, entries_released_in_date(1, 1, 2020))}"
+    )
+    sharded_result = sharded_entries_with_no_date()
+    print(
+        f"{len(sharded_result)} aplicativos sem data, resultados "
+        f"{same_apps(sharded_result, entries_with_no_date())}"
+    )
 
-print("#########")
-print("## Fim ##")
-print("#########")
+if is_main_process:
+    print("#########")
+    print("## Fim ##")
+    print("#########")